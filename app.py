@@ -7,7 +7,9 @@ import os
 import base64
 import json
 import asyncio
-from typing import Dict, Set
+import concurrent.futures
+from collections import OrderedDict
+from typing import Dict, Optional
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
@@ -20,12 +22,65 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# --- orjson (optional fast JSON) ---
+# C-level UTF-8 encode/decode, 5-10x faster than the stdlib json used on
+# the per-frame WebSocket path.
+try:
+    import orjson
+
+    def json_loads(data):
+        return orjson.loads(data)
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def json_dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except Exception:
+    def json_loads(data):
+        return json.loads(data)
+
+    def json_dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 # --- YOLO (ultralytics) ---
 try:
     from ultralytics import YOLO
 except Exception:
     YOLO = None
 
+# --- ONNX Runtime (optional INT8 path) ---
+# Export offline with: YOLO('yolov8n.pt').export(format='onnx', int8=True, data='coco128.yaml')
+# If yolov8n_int8.onnx is present, inference runs through onnxruntime
+# (quantized conv+BN fused kernels, VNNI int8 where available) instead of
+# the FP32 PyTorch path. Falls back to ultralytics transparently.
+ONNX_MODEL_PATH = 'yolov8n_int8.onnx'
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+# --- PyTurboJPEG (optional SIMD JPEG decode) ---
+# libjpeg-turbo's MMX/SSE2/AVX2 IDCT + color conversion is ~2-3x faster
+# than cv2.imdecode; decoding into a preallocated destination also avoids
+# allocating a fresh BGR buffer per frame.
+_tj = None
+try:
+    from turbojpeg import TurboJPEG
+    _tj = TurboJPEG()
+    print('✅ PyTurboJPEG enabled for JPEG decode.')
+except Exception:
+    pass
+
+# Fallback decode destinations, keyed by (width, height). Connection
+# handlers pass their own dict instead: a decoded frame sits in the
+# batching window after the handler moves on, so a shared buffer would
+# let one client's decode overwrite another's in-flight frame.
+_decode_buffers: Dict[tuple, np.ndarray] = {}
+
 # --- Gemini (google-generativeai) ---
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')  # ✅ FIXED: Use env var name, not the key itself
 USE_GEMINI = bool(GEMINI_API_KEY)
@@ -54,23 +109,281 @@ if USE_GEMINI:
 app = FastAPI()
 app.mount('/static', StaticFiles(directory='templates'), name='static')
 
-rooms: Dict[str, Set[WebSocket]] = {}
+# Each connected socket gets a bounded outbound queue drained by its own
+# relay task, so a slow consumer only loses its own stale messages
+# instead of backpressuring the whole room.
+rooms: Dict[str, Dict[WebSocket, asyncio.Queue]] = {}
+CLIENT_QUEUE_SIZE = 8
+
+# First byte of binary WebSocket messages identifies the payload type
+FRAME_TAG_JPEG = 0x01
+
+# YOLOv8n's native input width; clients resize to this before encoding
+MAX_FRAME_WIDTH = 640
+
+# --- Inference micro-batching ---
+# Frames from all rooms are funneled through one queue; a background task
+# coalesces everything that arrives within BATCH_WINDOW_S into a single
+# batched YOLO call (ultralytics accepts a list of images) and resolves
+# each caller's future with its own result.
+MAX_BATCH = 8
+BATCH_WINDOW_S = 0.015  # ~15 ms coalescing window
+
+_infer_queue: "asyncio.Queue" = None  # created on startup (needs running loop)
+
+# Single worker: the PyTorch model is not threadsafe for concurrent
+# forward calls, and one thread keeps inference strictly ordered.
+_yolo_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
 # --- Load YOLO model ---
 model = None
-if YOLO is not None:
+onnx_sess = None
+if ort is not None and os.path.exists(ONNX_MODEL_PATH):
+    try:
+        onnx_sess = ort.InferenceSession(ONNX_MODEL_PATH, providers=['CPUExecutionProvider'])
+        print(f'✅ INT8 ONNX model loaded: {ONNX_MODEL_PATH}')
+    except Exception as e:
+        print('❌ Failed to load ONNX model, falling back to PyTorch:', e)
+        onnx_sess = None
+if onnx_sess is None and YOLO is not None:
     try:
         model = YOLO('yolov8n.pt')  # lightweight version
         print('✅ YOLO model loaded.')
     except Exception as e:
         print('❌ Failed to load YOLO model at startup:', e)
 
+# On CUDA hosts the forward runs in FP16 (tensor-core matmuls, half the
+# activation bandwidth). This must go through the predictor's half=
+# option: AutoBackend wraps the in-memory module on the first predict
+# and re-floats it, so an in-place .half()/torch.compile of the module
+# here would be silently discarded on first inference.
+_pre_stream = None  # dedicated CUDA stream for preprocessing uploads
+_cuda_half = False  # pass half=True on ultralytics predict calls
+_staging_buffers: Dict[tuple, "object"] = {}  # pinned host tensors by (B, H, W)
+if model is not None:
+    try:
+        import torch
+        if torch.cuda.is_available():
+            _cuda_half = True
+            _pre_stream = torch.cuda.Stream()
+            print('✅ CUDA detected: YOLO forwards will run in FP16.')
+    except Exception as e:
+        print('⚠️ CUDA setup skipped:', e)
+
+
+def _preprocess_cuda(imgs):
+    """Upload and preprocess a uniform-shape batch on the side stream.
+
+    The H2D copy plus BGR->RGB / HWC->CHW / normalize run on a dedicated
+    CUDA stream from pinned staging memory, so they overlap the previous
+    batch's inference; the compute stream only waits on the recorded event.
+    """
+    import torch
+    key = (len(imgs),) + imgs[0].shape[:2]
+    staging = _staging_buffers.get(key)
+    if staging is None:
+        staging = torch.empty(
+            (len(imgs),) + imgs[0].shape, dtype=torch.uint8, pin_memory=True)
+        _staging_buffers[key] = staging
+    for i, img in enumerate(imgs):
+        staging[i].copy_(torch.from_numpy(img))
+
+    with torch.cuda.stream(_pre_stream):
+        x = staging.to('cuda', non_blocking=True)
+        x = x[..., [2, 1, 0]].permute(0, 3, 1, 2).half().mul_(1.0 / 255.0)
+        # YOLO's FPN concats need stride-32 dims; zero-pad bottom/right
+        # so arbitrary client resolutions (e.g. 640x360 from a 16:9
+        # phone) don't break the forward. Padding only extends the
+        # image, so box coordinates stay in source pixels.
+        ph = (-x.shape[2]) % 32
+        pw = (-x.shape[3]) % 32
+        if ph or pw:
+            x = torch.nn.functional.pad(x, (0, pw, 0, ph))
+        done = torch.cuda.Event()
+        done.record(_pre_stream)
+    torch.cuda.current_stream().wait_event(done)
+    return x
+
+# COCO class names for the ONNX path (ultralytics carries its own copy)
+COCO_NAMES = {i: n for i, n in enumerate([
+    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck', 'boat',
+    'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat',
+    'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack',
+    'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball',
+    'kite', 'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket',
+    'bottle', 'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple',
+    'sandwich', 'orange', 'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
+    'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
+    'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
+    'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
+    'toothbrush',
+])}
+
+ONNX_INPUT_SIZE = 640
+ONNX_CONF_THRESHOLD = 0.25
+ONNX_NMS_THRESHOLD = 0.45
+
+
+def _infer_onnx_batch(imgs):
+    """Run a batch through the INT8 ONNX session.
+
+    Returns one (N, 6) float array per image: x1, y1, x2, y2, conf, cls.
+    """
+    blob = cv2.dnn.blobFromImages(
+        imgs, 1 / 255.0, (ONNX_INPUT_SIZE, ONNX_INPUT_SIZE), swapRB=True)
+    input_name = onnx_sess.get_inputs()[0].name
+    outputs = onnx_sess.run(None, {input_name: blob})[0]  # (B, 84, 8400)
+
+    per_image = []
+    for img, out in zip(imgs, outputs):
+        preds = out.T  # (8400, 84): cx, cy, w, h, 80 class scores
+        scores = preds[:, 4:]
+        cls_ids = scores.argmax(axis=1)
+        confs = scores[np.arange(len(cls_ids)), cls_ids]
+        keep = confs >= ONNX_CONF_THRESHOLD
+        preds, cls_ids, confs = preds[keep], cls_ids[keep], confs[keep]
+        if len(preds) == 0:
+            per_image.append(np.empty((0, 6), dtype=np.float32))
+            continue
+
+        # Scale center-size boxes from model input back to source pixels
+        sx = img.shape[1] / ONNX_INPUT_SIZE
+        sy = img.shape[0] / ONNX_INPUT_SIZE
+        cx, cy, w, h = preds[:, 0] * sx, preds[:, 1] * sy, preds[:, 2] * sx, preds[:, 3] * sy
+        x1, y1 = cx - w / 2, cy - h / 2
+
+        boxes_xywh = np.stack([x1, y1, w, h], axis=1)
+        idx = cv2.dnn.NMSBoxes(
+            boxes_xywh.tolist(), confs.tolist(), ONNX_CONF_THRESHOLD, ONNX_NMS_THRESHOLD)
+        idx = np.array(idx).flatten() if len(idx) else np.empty(0, dtype=int)
+        rows = np.stack(
+            [x1[idx], y1[idx], x1[idx] + w[idx], y1[idx] + h[idx], confs[idx],
+             cls_ids[idx].astype(np.float32)], axis=1)
+        per_image.append(rows.astype(np.float32))
+    return per_image
+
+
+def _infer_ultralytics_batch(imgs):
+    """Run a batch through the ultralytics model, normalized to (N, 6) rows."""
+    results = None
+    if _pre_stream is not None and len({img.shape for img in imgs}) == 1:
+        try:
+            results = model(_preprocess_cuda(imgs), half=_cuda_half, verbose=False)
+        except Exception:
+            results = None  # CUDA hiccup or a shape the graph rejects
+    if results is None:
+        # Fallback covers mixed shapes and any tensor-path failure:
+        # ultralytics letterboxes and normalizes the ndarrays itself
+        results = model(imgs, half=_cuda_half, verbose=False)
+    per_image = []
+    for result in results:
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            per_image.append(np.empty((0, 6), dtype=np.float32))
+            continue
+        xyxy = boxes.xyxy.cpu().numpy()
+        confs = boxes.conf.cpu().numpy()
+        cls_ids = boxes.cls.cpu().numpy()
+        per_image.append(
+            np.concatenate([xyxy, confs[:, None], cls_ids[:, None]], axis=1).astype(np.float32))
+    return per_image
+
+
+def _infer_batch(imgs):
+    """Dispatch a batch to whichever backend is loaded."""
+    if onnx_sess is not None:
+        return _infer_onnx_batch(imgs)
+    return _infer_ultralytics_batch(imgs)
+
+
+async def _batch_worker():
+    """Coalesce queued frames into batched YOLO forward passes."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _infer_queue.get()]
+        # Drain whatever else arrives inside the coalescing window
+        deadline = loop.time() + BATCH_WINDOW_S
+        while len(batch) < MAX_BATCH:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_infer_queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        imgs = [img for img, _ in batch]
+        try:
+            results = await loop.run_in_executor(_yolo_pool, lambda: _infer_batch(imgs))
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e if isinstance(e, Exception) else RuntimeError(str(e)))
+            continue
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+
+async def run_inference(img_bgr):
+    """Submit a frame to the batching worker and wait for its result."""
+    fut = asyncio.get_running_loop().create_future()
+    await _infer_queue.put((img_bgr, fut))
+    return await fut
+
+
+@app.on_event('startup')
+async def _start_batch_worker():
+    global _infer_queue
+    _infer_queue = asyncio.Queue()
+    asyncio.create_task(_batch_worker())
+
+
+# Successive frames of the same scene produce identical prompts, so a
+# small LRU turns most Gemini calls into dictionary hits; the in-flight
+# map single-flights concurrent requests for the same prompt.
+LLM_CACHE_SIZE = 256
+_llm_cache: "OrderedDict[str, str]" = OrderedDict()
+_llm_inflight: Dict[str, asyncio.Future] = {}
+
 
 async def call_llm_gemini(prompt: str) -> str:
     """Call Gemini to summarize detected objects into short narration."""
     if not USE_GEMINI or model_gemini is None:
         return prompt  # fallback if Gemini unavailable
 
+    cached = _llm_cache.get(prompt)
+    if cached is not None:
+        _llm_cache.move_to_end(prompt)
+        return cached
+
+    inflight = _llm_inflight.get(prompt)
+    if inflight is not None:
+        return await inflight
+
+    fut = asyncio.get_running_loop().create_future()
+    _llm_inflight[prompt] = fut
+    try:
+        text = await _call_llm_gemini_uncached(prompt)
+        if text is None:
+            # Transient failure: serve the raw prompt this time but
+            # leave the cache alone so the next frame retries Gemini
+            text = prompt
+        else:
+            _llm_cache[prompt] = text
+            if len(_llm_cache) > LLM_CACHE_SIZE:
+                _llm_cache.popitem(last=False)
+        fut.set_result(text)
+        return text
+    except Exception as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        _llm_inflight.pop(prompt, None)
+
+
+async def _call_llm_gemini_uncached(prompt: str) -> Optional[str]:
+    """One real Gemini round trip; None on failure or an empty reply."""
     try:
         system_prompt = (
             "You are an assistive narrator for a visually impaired user. "
@@ -78,28 +391,48 @@ async def call_llm_gemini(prompt: str) -> str:
             "under 20 words. Avoid speculation or uncertainty."
         )
 
-        response = model_gemini.generate_content(
-            [system_prompt, prompt],
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            },
+        # generate_content is a blocking HTTP call; keep it off the event
+        # loop (default pool, not the inference worker).
+        response = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: model_gemini.generate_content(
+                [system_prompt, prompt],
+                safety_settings={
+                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+                },
+            ),
         )
 
         text = (getattr(response, "text", "") or "").strip()
-        return text[:220] if text else prompt
+        return text[:220] if text else None
     except Exception as e:
         print('⚠️ Gemini call failed:', e)
-        return prompt
+        return None
+
 
+def jpeg_to_bgr(data: bytes, buffers: Optional[Dict[tuple, np.ndarray]] = None):
+    """Decode raw JPEG bytes to OpenCV BGR format.
 
-def b64_to_bgr(data_b64: str):
-    """Decode base64 image data to OpenCV BGR format."""
+    buffers holds the reusable decode destinations; callers that keep
+    decoded frames alive across calls (the websocket handlers) must
+    pass a dict of their own so concurrent connections never share one.
+    """
+    if buffers is None:
+        buffers = _decode_buffers
     try:
-        header, encoded = data_b64.split(',', 1) if ',' in data_b64 else (None, data_b64)
-        data = base64.b64decode(encoded)
+        if _tj is not None:
+            try:
+                width, height, _, _ = _tj.decode_header(data)
+                dst = buffers.get((width, height))
+                if dst is None:
+                    dst = np.empty((height, width, 3), dtype=np.uint8)
+                    buffers[(width, height)] = dst
+                return _tj.decode(data, dst=dst)
+            except Exception:
+                pass  # corrupt header or non-JPEG; fall through to OpenCV
         arr = np.frombuffer(data, dtype=np.uint8)
         img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
         return img
@@ -107,51 +440,130 @@ def b64_to_bgr(data_b64: str):
         return None
 
 
-async def process_frame_and_respond(img_bgr) -> Dict:
-    """Run YOLO detection and build response payload."""
+def b64_to_bgr(data_b64: str, buffers: Optional[Dict[tuple, np.ndarray]] = None):
+    """Decode base64 image data to OpenCV BGR format (legacy text protocol)."""
+    try:
+        # rpartition handles both data-URLs and bare base64 without a branch
+        encoded = data_b64.rpartition(',')[2]
+        return jpeg_to_bgr(base64.b64decode(encoded, validate=False), buffers)
+    except Exception:
+        return None
+
+
+# Per-room scene memory for the narration skip (raw counts-vector bytes)
+_last_counts: Dict[str, bytes] = {}
+_last_summary: Dict[str, str] = {}
+
+
+async def run_detection(img_bgr):
+    """Run YOLO detection and build the detection payload (no narration).
+
+    Narration is deliberately not awaited here: bounding boxes are
+    time-sensitive for the dashboard, while the Gemini summary follows
+    as a separate 'narration' message when it is ready.
+    """
     payload = {'objects': [], 'summary': ''}
     global model
 
     if img_bgr is None:
         payload['summary'] = 'Invalid frame received.'
-        return payload
-    if model is None:
+        return payload, None
+    if model is None and onnx_sess is None:
         payload['summary'] = 'Model not loaded on server.'
-        return payload
+        return payload, None
+
+    # Clients are expected to downscale to <=640 before encoding; shrink
+    # anything larger here so misbehaving clients don't inflate decode
+    # and inference cost for the shared batch.
+    if img_bgr.shape[1] > MAX_FRAME_WIDTH:
+        scale = MAX_FRAME_WIDTH / img_bgr.shape[1]
+        img_bgr = cv2.resize(
+            img_bgr, (MAX_FRAME_WIDTH, max(1, int(img_bgr.shape[0] * scale))))
 
-    # YOLO inference
+    # YOLO inference (batched across concurrent clients)
     try:
-        results = model(img_bgr, verbose=False)[0]
-        boxes = results.boxes
-        names = results.names if hasattr(results, 'names') else {}
-        objs = []
-        for box in boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-            conf = float(box.conf[0]) if hasattr(box, 'conf') else float(box.conf)
-            cls = int(box.cls[0]) if hasattr(box, 'cls') else int(box.cls)
-            label = names.get(cls, str(cls))
-            objs.append({'label': label, 'conf': round(conf, 2), 'bbox': [x1, y1, x2, y2]})
-        payload['objects'] = objs
+        rows = await run_inference(img_bgr)
+        names = model.names if model is not None else COCO_NAMES
+        if len(rows):
+            # One vectorized pass over the rows instead of per-box
+            # float()/int() conversions and a string-keyed counts dict.
+            xyxy = rows[:, :4].astype(np.int32)
+            confs = rows[:, 4].round(2)
+            cls_ids = rows[:, 5].astype(np.int32)
+            payload['objects'] = [
+                {'label': names.get(int(c), str(int(c))), 'conf': float(cf), 'bbox': b.tolist()}
+                for b, cf, c in zip(xyxy, confs, cls_ids)]
+            counts_vec = np.bincount(cls_ids, minlength=len(names))
+        else:
+            counts_vec = np.zeros(len(names), dtype=np.int64)
     except Exception as e:
         print('YOLO inference error:', e)
         payload['summary'] = 'Detection error.'
-        return payload
+        return payload, None
+
+    return payload, counts_vec
+
 
-    # Build object count prompt
-    counts = {}
-    for o in payload['objects']:
-        counts[o['label']] = counts.get(o['label'], 0) + 1
+async def narrate_and_broadcast(room: str, counts_vec):
+    """Produce the Gemini summary for a frame's class counts and broadcast it.
 
-    if counts:
-        parts = [f"{v} {k}{'s' if v > 1 else ''}" for k, v in counts.items()]
-        prompt = 'I see ' + ', '.join(parts) + '.'
+    Runs as a fire-and-forget task after the detections have already been
+    shipped. counts_vec is the per-class-id histogram from run_detection;
+    if the scene is unchanged since the last narrated frame in this room
+    (same counts => same prompt => same summary), skips Gemini and the
+    follow-up message entirely.
+    """
+    counts_key = counts_vec.tobytes()
+    if counts_key == _last_counts.get(room):
+        return
+
+    names = model.names if model is not None else COCO_NAMES
+    present = [(names.get(i, str(i)), int(c)) for i, c in enumerate(counts_vec) if c]
+    if present:
+        prompt = 'I see ' + ', '.join(
+            f"{v} {k}{'s' if v > 1 else ''}" for k, v in present) + '.'
     else:
         prompt = 'No notable objects detected.'
 
-    # Gemini summarization
-    summary = await call_llm_gemini(prompt)
-    payload['summary'] = summary
-    return payload
+    try:
+        summary = await call_llm_gemini(prompt)
+    except Exception as e:
+        print('⚠️ Narration failed:', e)
+        return
+    _last_counts[room] = counts_key
+    _last_summary[room] = summary
+    broadcast(room, json_dumps_bytes({'type': 'narration', 'text': summary}))
+
+
+async def _relay(room: str, ws: WebSocket, q: asyncio.Queue):
+    """Drain one client's outbound queue into its socket."""
+    try:
+        while True:
+            message = await q.get()
+            if isinstance(message, bytes):
+                await ws.send_bytes(message)
+            else:
+                await ws.send_text(message)
+    except Exception:
+        rooms.get(room, {}).pop(ws, None)
+
+
+def broadcast(room: str, message):
+    """Enqueue a message on every socket in a room (drop-oldest on overflow).
+
+    The put never blocks: a congested client simply loses its stalest
+    message while everyone else receives the broadcast immediately.
+    Pass bytes to share one serialized buffer across every socket.
+    """
+    for q in list(rooms.get(room, {}).values()):
+        try:
+            q.put_nowait(message)
+        except asyncio.QueueFull:
+            try:
+                q.get_nowait()
+                q.put_nowait(message)
+            except Exception:
+                pass
 
 
 @app.get('/')
@@ -177,15 +589,38 @@ async def websocket_endpoint(websocket: WebSocket, room: str):
     await websocket.accept()
 
     if room not in rooms:
-        rooms[room] = set()
-    rooms[room].add(websocket)
+        rooms[room] = {}
+    out_queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+    rooms[room][websocket] = out_queue
+    relay_task = asyncio.create_task(_relay(room, websocket, out_queue))
+    # Per-connection decode destinations; the handler is serial (it
+    # awaits run_detection before the next receive), so the previous
+    # frame is out of the pipeline before the buffer is reused.
+    decode_buffers: Dict[tuple, np.ndarray] = {}
     print(f"🔌 Client connected to room {room}. Total clients: {len(rooms[room])}")
 
     try:
         while True:
-            data = await websocket.receive_text()
+            msg = await websocket.receive()
+            if msg.get('type') == 'websocket.disconnect':
+                raise WebSocketDisconnect(msg.get('code', 1000))
+
+            # Binary frames carry raw JPEG bytes behind a 1-byte type tag
+            # (no base64 inflation, no JSON parse on the hot path).
+            if msg.get('bytes') is not None:
+                data = msg['bytes']
+                if len(data) < 2 or data[0] != FRAME_TAG_JPEG:
+                    continue
+                img = jpeg_to_bgr(data[1:], decode_buffers)
+                payload, counts_vec = await run_detection(img)
+                broadcast(room, json_dumps_bytes({'type': 'detection', 'payload': payload}))
+                if counts_vec is not None:
+                    asyncio.create_task(narrate_and_broadcast(room, counts_vec))
+                continue
+
+            # Text messages: control traffic plus the legacy base64 frame format
             try:
-                js = json.loads(data)
+                js = json_loads(msg.get('text') or '')
             except Exception:
                 continue
 
@@ -194,30 +629,34 @@ async def websocket_endpoint(websocket: WebSocket, room: str):
                 b64 = js.get('b64')
                 if not b64:
                     continue
-                img = b64_to_bgr(b64)
-                payload = await process_frame_and_respond(img)
-                message = json.dumps({'type': 'detection', 'payload': payload})
-
-                # Broadcast to all sockets in this room
-                to_remove = []
-                for ws in list(rooms.get(room, [])):
-                    try:
-                        await ws.send_text(message)
-                    except Exception:
-                        to_remove.append(ws)
-                for r in to_remove:
-                    rooms[room].discard(r)
+                img = b64_to_bgr(b64, decode_buffers)
+                payload, counts_vec = await run_detection(img)
+                broadcast(room, json_dumps_bytes({'type': 'detection', 'payload': payload}))
+                if counts_vec is not None:
+                    asyncio.create_task(narrate_and_broadcast(room, counts_vec))
 
             elif typ == 'ping':
-                await websocket.send_text(json.dumps({'type': 'pong'}))
+                await websocket.send_text(json_dumps({'type': 'pong'}))
 
     except WebSocketDisconnect:
         print(f"⚠️ Client disconnected from room {room}")
     finally:
-        rooms.get(room, set()).discard(websocket)
+        relay_task.cancel()
+        rooms.get(room, {}).pop(websocket, None)
 
 
 if __name__ == '__main__':
     print("\nDashboard:  http://localhost:8000/")
     print("Mobile page: http://localhost:8000/mobile")
-    uvicorn.run('app:app', host='0.0.0.0', port=8000, reload=False)
+    # uvloop's C-level transports have much lower per-send overhead than
+    # the stock asyncio selectors; it's unix-only, so fall back on Windows.
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = 'uvloop'
+    except Exception:
+        loop_impl = 'asyncio'
+    # permessage-deflate would recompress the identical broadcast payload
+    # once per connection; we serialize once and send the same bytes instead.
+    uvicorn.run('app:app', host='0.0.0.0', port=8000,
+                loop=loop_impl, http='httptools', ws='websockets',
+                ws_per_message_deflate=False, reload=False)
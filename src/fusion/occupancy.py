@@ -2,34 +2,64 @@
 import numpy as np
 from typing import List, Dict, Optional
 
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
 SECTORS = 3  # left, center, right
 
-def sectors_from_detections(width: int, detections: List[Dict]) -> np.ndarray:
+
+def _sectors_kernel(bboxes: np.ndarray, width: float) -> np.ndarray:
+    """Classify bbox centers into sectors. Compiled with Numba when present."""
+    occ = np.zeros(SECTORS, dtype=np.bool_)
+    third = width / 3.0
+    for i in range(bboxes.shape[0]):
+        cx = (bboxes[i, 0] + bboxes[i, 2]) * 0.5
+        if cx < third:
+            occ[0] = True
+        elif cx > 2.0 * third:
+            occ[2] = True
+        else:
+            occ[1] = True
+    return occ
+
+
+def _fuse_kernel(occupancy: np.ndarray, distance_m: float,
+                 danger_m: float) -> np.ndarray:
+    """Fuse occupancy with range; NaN distance means no reading."""
+    fused = occupancy.copy()
+    if not np.isnan(distance_m) and distance_m < danger_m:
+        fused[1] = True
+    return fused
+
+
+# Compile the per-frame kernels when numba is installed; the plain
+# Python definitions stay as interchangeable fallbacks.
+_sectors = njit(cache=True)(_sectors_kernel) if njit else _sectors_kernel
+_fuse = njit(cache=True)(_fuse_kernel) if njit else _fuse_kernel
+
+def sectors_from_detections(width: int, detections) -> np.ndarray:
     """
     Convert detections to sector occupancy map.
-    
+
     Args:
         width: Frame width in pixels
-        detections: List of detection dicts with 'bbox' key
-    
+        detections: (N, 4) array of xyxy bboxes, or list of detection
+                    dicts with 'bbox' key
+
     Returns:
         Boolean array [left, center, right] indicating occupied sectors
     """
-    occupancy = np.zeros(SECTORS, dtype=bool)
-    
-    for det in detections:
-        x1, _, x2, _ = det["bbox"]
-        center_x = (x1 + x2) / 2.0
-        
-        # Map to sectors
-        if center_x < width / 3:
-            occupancy[0] = True  # Left
-        elif center_x > 2 * width / 3:
-            occupancy[2] = True  # Right
-        else:
-            occupancy[1] = True  # Center
-    
-    return occupancy
+    if len(detections) == 0:
+        return np.zeros(SECTORS, dtype=bool)
+
+    if isinstance(detections, np.ndarray):
+        bboxes = np.ascontiguousarray(detections, dtype=np.float32)
+    else:
+        bboxes = np.array([d["bbox"] for d in detections], dtype=np.float32)
+
+    return _sectors(bboxes, float(width))
 
 def fuse_with_range(occupancy: np.ndarray,
                     distance_m: Optional[float],
@@ -45,13 +75,9 @@ def fuse_with_range(occupancy: np.ndarray,
     Returns:
         Fused occupancy array
     """
-    fused = occupancy.copy()
-    
-    # If ultrasonic detects close obstacle, mark center as blocked
-    if distance_m is not None and distance_m < danger_m:
-        fused[1] = True  # Center blocked
-    
-    return fused
+    # If ultrasonic detects a close obstacle the kernel marks center blocked
+    d = float("nan") if distance_m is None else float(distance_m)
+    return _fuse(np.asarray(occupancy, dtype=np.bool_), d, float(danger_m))
 
 def describe_occupancy(occupancy: np.ndarray,
                        distance_m: Optional[float] = None) -> str:
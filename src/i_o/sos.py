@@ -1,4 +1,5 @@
 import time
+from collections import deque
 from typing import Optional, Tuple
 
 from sensors.gps import GPS
@@ -43,15 +44,43 @@ def _normalize_whatsapp(from_number: str | None) -> str | None:
     return n
 
 
+# Cached sessions: the Twilio client keeps an HTTPS keep-alive connection
+# and the SMTP session keeps its TLS handshake, so retries don't pay the
+# full connection setup cost again.
+_twilio_client = None
+_smtp_server = None
+
+
+def _get_twilio():
+    global _twilio_client
+    if _twilio_client is None:
+        from twilio.rest import Client
+        _twilio_client = Client(TWILIO_SID, TWILIO_AUTH)
+    return _twilio_client
+
+
+def _get_smtp():
+    global _smtp_server
+    import smtplib
+    if _smtp_server is not None:
+        try:
+            _smtp_server.noop()
+            return _smtp_server
+        except Exception:
+            _smtp_server = None
+    server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT)
+    server.login(SMTP_USER, SMTP_PASS)
+    _smtp_server = server
+    return _smtp_server
+
+
 def _send_twilio_sms(msg: str) -> bool:
     if not (TWILIO_SID and TWILIO_AUTH and TWILIO_FROM and EMERGENCY_CONTACT):
         return False
     try:
-        from twilio.rest import Client
-        client = Client(TWILIO_SID, TWILIO_AUTH)
         from_num = _normalize_e164(TWILIO_FROM)
         to_num = _normalize_e164(EMERGENCY_CONTACT)
-        client.messages.create(body=msg, from_=from_num, to=to_num)
+        _get_twilio().messages.create(body=msg, from_=from_num, to=to_num)
         return True
     except Exception as e:
         print(f"⚠️ Twilio SMS error: {e}")
@@ -64,12 +93,10 @@ def _send_twilio_whatsapp(msg: str) -> bool:
     if not (TWILIO_SID and TWILIO_AUTH and from_wa and EMERGENCY_CONTACT_WHATSAPP):
         return False
     try:
-        from twilio.rest import Client
-        client = Client(TWILIO_SID, TWILIO_AUTH)
         to_wa = EMERGENCY_CONTACT_WHATSAPP
         if not to_wa.startswith('whatsapp:'):
             to_wa = 'whatsapp:' + _normalize_e164(to_wa)
-        client.messages.create(body=msg, from_=from_wa, to=to_wa)
+        _get_twilio().messages.create(body=msg, from_=from_wa, to=to_wa)
         return True
     except Exception as e:
         print(f"⚠️ Twilio WhatsApp error: {e}")
@@ -80,15 +107,12 @@ def _send_email(msg: str) -> bool:
     if not (SMTP_HOST and SMTP_USER and SMTP_PASS and EMERGENCY_EMAIL):
         return False
     try:
-        import smtplib
         from email.mime.text import MIMEText
         mime = MIMEText(msg)
         mime["Subject"] = "Emergency Alert"
         mime["From"] = SMTP_USER
         mime["To"] = EMERGENCY_EMAIL
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-            server.login(SMTP_USER, SMTP_PASS)
-            server.send_message(mime)
+        _get_smtp().send_message(mime)
         return True
     except Exception as e:
         print(f"⚠️ Email error: {e}")
@@ -99,7 +123,8 @@ class SOS:
     def __init__(self, enabled: bool = True, press_window_s: float = 1.5, retries: int = 3):
         self.enabled = enabled
         self.press_window_s = press_window_s
-        self._press_times: list[float] = []
+        # Only the 3 most recent presses matter; maxlen evicts older ones
+        self._press_times: deque[float] = deque(maxlen=3)
         self._gps = GPS()
         self._retries = retries
 
@@ -107,9 +132,8 @@ class SOS:
         if not self.enabled:
             return
         now = time.time()
-        self._press_times = [t for t in self._press_times if now - t <= self.press_window_s]
         self._press_times.append(now)
-        if len(self._press_times) >= 3:
+        if len(self._press_times) == 3 and now - self._press_times[0] <= self.press_window_s:
             self._press_times.clear()
             self.trigger()
 
@@ -131,14 +155,16 @@ class SOS:
 
         body = f"🚨 SOS Alert! {payload}. Location: {link}"
         sent = False
+        # Prioritized fallback: WhatsApp, else SMS, else email. One
+        # channel fires per attempt (no duplicate alerts, no per-message
+        # cost for the others); the cached Twilio/SMTP sessions keep the
+        # sequential walk cheap since retries skip connection setup.
+        channels = (_send_twilio_whatsapp, _send_twilio_sms, _send_email)
         for attempt in range(1, self._retries + 1):
-            # Try WhatsApp first (if configured), then SMS, then Email
-            if _send_twilio_whatsapp(body):
-                sent = True
-            elif _send_twilio_sms(body):
-                sent = True
-            elif _send_email(body):
-                sent = True
+            for ch in channels:
+                if ch(body):
+                    sent = True
+                    break
             if sent:
                 break
             time.sleep(0.5)
@@ -156,20 +182,14 @@ class SOS:
             import RPi.GPIO as GPIO
             GPIO.setmode(GPIO.BCM)
             GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-            press_count = 0
-            last_press = 0.0
+            presses: deque[float] = deque(maxlen=3)
             while True:
                 if not GPIO.input(pin):
                     now = time.time()
-                    if now - last_press < self.press_window_s:
-                        press_count += 1
-                    else:
-                        press_count = 1
-                    last_press = now
-                    if press_count >= 3:
+                    presses.append(now)
+                    if len(presses) == 3 and now - presses[0] <= self.press_window_s:
                         self.trigger()
-                        press_count = 0
-                        last_press = 0.0
+                        presses.clear()
                     time.sleep(0.2)
                 time.sleep(0.05)
         except Exception as e:
@@ -8,6 +8,11 @@ class CommandRecognizer:
         self.enabled = enabled
         self._vosk_ready = False
         self._warned = False
+        # Loaded once and reused: the Vosk model alone takes seconds to
+        # mmap, and opening a PortAudio stream costs 10-50 ms per call.
+        self._model = None
+        self._rec = None
+        self._stream = None
 
     def _ensure_model(self):
         if not self.enabled or self._vosk_ready:
@@ -21,25 +26,47 @@ class CommandRecognizer:
                 self._warned = True
             self.enabled = False
 
+    def _ensure_pipeline(self):
+        """Lazily build and cache the model, recognizer, and input stream."""
+        if self._stream is not None:
+            return
+        import vosk, sounddevice as sd
+        if self._model is None:
+            self._model = vosk.Model(self.model_dir) if self.model_dir else vosk.Model()
+        self._rec = vosk.KaldiRecognizer(self._model, 16000)
+        self._rec.SetWords(False)
+
+        def callback(indata, frames, time, status):  # noqa: ARG001
+            if self._rec.AcceptWaveform(indata.tobytes()):
+                pass
+
+        # Created once but only running inside a listen window; start()
+        # on a cached stream is cheap, reopening the device is not.
+        self._stream = sd.RawInputStream(
+            samplerate=16000, blocksize=8000, dtype='int16', channels=1, callback=callback)
+
     def listen_once(self, timeout_s: float = 2.0) -> Optional[str]:
         self._ensure_model()
         if not self.enabled:
             return None
         try:
-            import vosk, sounddevice as sd, json
-            model = vosk.Model(self.model_dir) if self.model_dir else vosk.Model()
-            rec = vosk.KaldiRecognizer(model, 16000)
-            rec.SetWords(False)
-
-            def callback(indata, frames, time, status):  # noqa: ARG001
-                if rec.AcceptWaveform(indata.tobytes()):
-                    pass
-
-            with sd.RawInputStream(samplerate=16000, blocksize=8000, dtype='int16', channels=1, callback=callback):
+            import sounddevice as sd, json
+            self._ensure_pipeline()
+            # Reset first so speech captured before this window (the
+            # recognizer is cached across calls) can't leak into it,
+            # then only run the microphone while we're listening.
+            try:
+                self._rec.Reset()
+            except Exception:
+                pass
+            self._stream.start()
+            try:
                 sd.sleep(int(timeout_s * 1000))
+            finally:
+                self._stream.stop()
 
             try:
-                res = rec.Result()
+                res = self._rec.Result()
                 parsed = json.loads(res)
                 text = parsed.get("text", "").strip().lower()
             except Exception:
@@ -54,4 +81,14 @@ class CommandRecognizer:
                 print("⚠️ STT runtime error; disabling STT")
                 self._warned = True
             self.enabled = False
+            self._close_stream()
             return None
+
+    def _close_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
@@ -34,12 +34,25 @@ def start_tts_worker():
     _stop_flag = False
     def _run():
         import time
+        global _last_text, _last_time
         while not _stop_flag:
             try:
-                text = _queue.get(timeout=0.1)
+                item = _queue.get(timeout=0.1)
             except Exception:
                 continue
             try:
+                if isinstance(item, tuple):
+                    # (ctx, fallback, dedupe window) from speak_ctx_async:
+                    # render the narration here so the main loop never
+                    # waits on the generator
+                    ctx, fallback, window = item
+                    text = _generate_narration(ctx) or fallback
+                    now = time.time()
+                    if text == _last_text and (now - _last_time) < window:
+                        continue
+                    _last_text, _last_time = text, now
+                else:
+                    text = item
                 speak(text)
             except Exception:
                 pass
@@ -164,6 +177,39 @@ def speak_async(text: str, dedupe_window_s: float = 1.0):
         # Fallback to sync speak on error
         speak(text)
 
+def _generate_narration(ctx: dict):
+    """Render narration text for ctx; None on any failure."""
+    try:
+        try:
+            from i_o.narration import generate_sync
+        except ImportError:
+            from narration import generate_sync
+        return generate_sync(ctx)
+    except Exception:
+        return None
+
+def speak_ctx_async(ctx: dict, fallback: str, dedupe_window_s: float = 1.0):
+    """Queue narration context for the worker to render and speak.
+
+    The narration generator may hit a network LLM and block for
+    hundreds of ms; pushing the context instead of the finished phrase
+    keeps the caller's cost to a queue put. fallback is spoken when
+    generation fails or returns nothing.
+    """
+    global _queue
+    if not fallback and not ctx:
+        return
+    try:
+        if _queue is None:
+            start_tts_worker()
+        # Drop if queue full to avoid backlog
+        try:
+            _queue.put_nowait((ctx, fallback, dedupe_window_s))
+        except Exception:
+            pass
+    except Exception:
+        speak(fallback)
+
 def adjust_rate(delta: int):
     """Adjust speaking rate relatively."""
     global _engine
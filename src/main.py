@@ -1,8 +1,22 @@
 """Main entry point for Pathfinder."""
 import cv2
+import numpy as np
+import os
 import time
 import signal
 import sys
+from collections import deque
+
+# Debug window is opt-in: cv2.waitKey(1) costs ~15 ms on Windows no
+# matter the argument, which alone caps the loop well below target FPS.
+DEBUG_UI = bool(os.environ.get("PF_DEBUG", ""))
+
+
+def _poll_key() -> int:
+    """Non-blocking keystroke poll; -1 when no key is pending."""
+    poll = getattr(cv2, "pollKey", None)
+    key = poll() if poll is not None else cv2.waitKey(1)
+    return key & 0xFF if key >= 0 else -1
 
 # Note: Import paths will work when run from project root as: python -m src.main
 # For standalone, you may need to adjust sys.path
@@ -10,18 +24,16 @@ import sys
 try:
     from config import VISION_MODEL, DANGER_DISTANCE_M, TTS_FORCE_SAPI, TTS_VOICE_INDEX
     from perception.detector import Detector
+    from perception.camera import CameraThread
     from sensors.ultrasonic import Ultrasonic
-    from fusion.occupancy import (
-        sectors_from_detections, fuse_with_range
-    )
+    from fusion.occupancy import fuse_with_range
     from i_o.tts import (
-        speak, speak_async, init_tts, list_voices, set_voice,
+        speak, speak_async, speak_ctx_async, init_tts, list_voices, set_voice,
         start_tts_worker, stop_tts_worker, adjust_rate, adjust_volume,
     )
     from i_o.haptics import Haptics
     from i_o.sos import SOS
     from i_o.stt import CommandRecognizer
-    from i_o.narration import generate_sync as narr_sync
 except ImportError:
     # Fallback for direct execution
     import os
@@ -29,18 +41,16 @@ except ImportError:
     sys.path.insert(0, os.path.dirname(__file__))
     from config import VISION_MODEL, DANGER_DISTANCE_M, TTS_FORCE_SAPI, TTS_VOICE_INDEX
     from perception.detector import Detector
+    from perception.camera import CameraThread
     from sensors.ultrasonic import Ultrasonic
-    from fusion.occupancy import (
-        sectors_from_detections, fuse_with_range
-    )
+    from fusion.occupancy import fuse_with_range
     from i_o.tts import (
-        speak, speak_async, init_tts, list_voices, set_voice,
+        speak, speak_async, speak_ctx_async, init_tts, list_voices, set_voice,
         start_tts_worker, stop_tts_worker, adjust_rate, adjust_volume,
     )
     from i_o.haptics import Haptics
     from i_o.sos import SOS
     from i_o.stt import CommandRecognizer
-    from i_o.narration import generate_sync as narr_sync
 
 def describe(occ):
     """Generate description of occupancy state."""
@@ -99,6 +109,10 @@ def run():
     except Exception:
         pass
 
+    # Hand the capture to a background grabber so the loop always sees
+    # the freshest frame instead of whatever the backend buffered
+    camera = CameraThread(cap).start()
+
     # Initialize TTS according to config and announce readiness
     try:
         init_tts(force_sapi=TTS_FORCE_SAPI, voice_index=TTS_VOICE_INDEX)
@@ -113,31 +127,73 @@ def run():
     except Exception:
         pass
     
-    last_spoken = 0
-    last_haptic = 0
-    last_obj_spoken = 0.0
+    # Gating timers use monotonic time (time.time() is not monotonic and
+    # has ~15 ms resolution on Windows); -inf so the first frame fires.
+    last_spoken = float("-inf")
+    last_haptic = float("-inf")
+    last_obj_spoken = float("-inf")
     last_obj_key = None  # (label, sector)
     frame_count = 0
     cached_dets = []
+    # Frame-difference gate: YOLO only runs when the (downsampled) scene
+    # actually changed; a still scene costs a ~0.1 ms mean-abs-diff
+    # instead of a full forward pass.
+    prev_small = None
+    diff_thresh = 3.0  # mean abs gray diff on the 64x48 thumbnail
+    # EMA of the diff metric drives the inference resolution: a stable
+    # scene gets by on 320 (inference scales ~imgsz^2, so ~0.6x the
+    # FLOPs of 416), a rapidly changing one earns 480.
+    diff_ema = 0.0
+    ema_alpha = 0.3
+    # On CUDA, batch a few changed frames per forward pass; kernel
+    # launches amortize across the batch. Counterproductive on CPU.
+    batch_frames = deque(maxlen=3) if det.cuda else None
+    batch_pending_since = None  # when the oldest unflushed frame arrived
     tts_muted = False
     current_voice_index = TTS_VOICE_INDEX if isinstance(TTS_VOICE_INDEX, int) else 0
     
     try:
         target_dt = 1.0 / 15.0  # ~15 FPS target
         while True:
-            ok, frame = cap.read()
-            if not ok:
-                break
-            
-            # Detect objects
-            if frame_count % 3 == 0:
-                dets = det.infer(frame, imgsz=416)
-                cached_dets = dets
-            else:
-                dets = cached_dets
+            t_start = time.perf_counter()
+            # One timestamp per iteration; every gate below compares
+            # against this instead of making its own clock syscall.
+            now = time.monotonic()
+            ok, frame = camera.read()
+            if not ok or frame is None:
+                if not camera.wait_new_frame(timeout=0.5):
+                    break
+                continue
+
+            # Detect objects only when the scene changed
+            small = cv2.resize(
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 48)).astype(np.int16)
+            diff = diff_thresh if prev_small is None else float(np.abs(small - prev_small).mean())
+            diff_ema += ema_alpha * (diff - diff_ema)
+            # Scale resolution with how fast the scene is changing
+            imgsz = 320 if diff_ema < 2.0 else (480 if diff_ema > 8.0 else 416)
+            if diff >= diff_thresh:
+                if batch_frames is not None:
+                    # Copy: the grabber recycles its frame buffers, so a
+                    # stored reference would mutate before the flush
+                    batch_frames.append(frame.copy())
+                    if batch_pending_since is None:
+                        batch_pending_since = now
+                else:
+                    cached_dets = det.infer(frame, imgsz=imgsz)
+                prev_small = small
+            # Flush when the batch fills, or after a short deadline so a
+            # scene that changes once and then holds still is still
+            # inferred instead of waiting forever behind a partial batch
+            if batch_frames and (len(batch_frames) == batch_frames.maxlen
+                                 or now - batch_pending_since >= 0.2):
+                cached_dets = det.infer_batch(list(batch_frames), imgsz=imgsz)[-1]
+                batch_frames.clear()
+                batch_pending_since = None
+            dets = cached_dets
             
-            # Sector analysis
-            occ = sectors_from_detections(frame.shape[1], dets)
+            # Sector analysis happens inside Detector post-processing
+            occ = det.last_occ
             
             # Range sensing
             dist = rng.median()
@@ -146,48 +202,48 @@ def run():
             fused = fuse_with_range(occ, dist, DANGER_DISTANCE_M)
             
             # Rate-limited TTS
-            now = time.time()
-            # Prefer announcing specific object names promptly
-            top = max(dets, key=lambda d: d.get("conf", 0.0), default=None)
-            if top is not None:
-                x1, _, x2, _ = top["bbox"]
-                cx = (x1 + x2) / 2.0
-                width = frame.shape[1]
-                sector = "left" if cx < width/3 else ("right" if cx > 2*width/3 else "ahead")
+            # Prefer announcing specific object names promptly; argmax
+            # on the conf array is one C call vs max(key=lambda) walking
+            # the dict list in interpreted code
+            top_i = int(det.last_conf.argmax()) if len(dets) == det.last_conf.size != 0 else -1
+            if top_i >= 0:
+                top = dets[top_i]
+                # Sector already classified by the detector
+                sector = ("left", "ahead", "right")[int(det.last_sectors[top_i])]
                 key = (top.get("label", "object"), sector)
                 if key != last_obj_key or (now - last_obj_spoken) > 1.5:
-                    # Build narration context for Gemini (optional)
+                    # Narration context for Gemini (optional); the TTS
+                    # worker renders it off the camera loop
                     ctx = {"label": key[0], "sector": sector, "distance_m": dist, "obstacle": True}
-                    msg = narr_sync(ctx) or (
-                        f"{key[0]} {sector}" + (f", {dist:.1f} meters" if dist else "")
-                    )
+                    fallback = f"{key[0]} {sector}" + (f", {dist:.1f} meters" if dist else "")
                     if not tts_muted:
-                        speak_async(msg, dedupe_window_s=0.8)
+                        speak_ctx_async(ctx, fallback, dedupe_window_s=0.8)
                     last_obj_key = key
                     last_obj_spoken = now
                     last_spoken = now  # also update generic timer to avoid double speak
             elif now - last_spoken > 1.2:
                 # Fallback to generic occupancy summary
                 ctx = {"label": "", "sector": "ahead", "distance_m": dist, "obstacle": any(fused)}
-                msg = narr_sync(ctx) or (
+                fallback = (
                     f"{'Obstacle ' if any(fused) else ''}{describe(fused)}" + (f", {dist:.1f} meters" if dist else "")
                 )
                 if not tts_muted:
-                    speak_async(msg, dedupe_window_s=1.0)
+                    speak_ctx_async(ctx, fallback, dedupe_window_s=1.0)
                 last_spoken = now
 
             # Haptics at ~10 Hz
             if now - last_haptic >= 0.1:
-                l = hpx.map_intensity(fused[0], dist, DANGER_DISTANCE_M)
-                c = hpx.map_intensity(fused[1], dist, DANGER_DISTANCE_M)
-                r = hpx.map_intensity(fused[2], dist, DANGER_DISTANCE_M)
+                l, c, r = hpx.map_intensity_batch(fused, dist, DANGER_DISTANCE_M)
                 hpx.send(l, c, r)
                 last_haptic = now
             
-            # Debug visualization
-            _draw_debug(frame, dets, fused, dist)
-            
-            key = cv2.waitKey(1) & 0xFF
+            # Debug visualization (opt-in via PF_DEBUG, every 3rd frame)
+            if DEBUG_UI and frame_count % 3 == 0:
+                _draw_debug(frame, dets, fused, dist)
+
+            # Keystrokes only arrive through the HighGUI window, so
+            # polling is pointless without it
+            key = _poll_key() if DEBUG_UI else -1
             if key == 27:
                 break
             if key == ord('s'):
@@ -245,15 +301,18 @@ def run():
                 except Exception:
                     pass
 
-            # FPS throttle
+            # FPS throttle: sleep only the budget left after the work this
+            # iteration actually did, gated on the grabber so a fresh frame
+            # wakes the loop early instead of over-sleeping.
             frame_count += 1
-            # busy loop barrier to approximately 15 FPS
-            time.sleep(max(0.0, target_dt - 0.001))
+            remaining = target_dt - (time.perf_counter() - t_start)
+            if remaining > 0:
+                camera.wait_new_frame(timeout=remaining)
                 
     except KeyboardInterrupt:
         print("\n⚠️ Interrupted by user")
     finally:
-        cap.release()
+        camera.release()
         cv2.destroyAllWindows()
         rng.cleanup()
         try:
@@ -263,8 +322,29 @@ def run():
         print("✅ Cleanup complete")
     
 
+_overlay_cache = {}
+
+
+def _static_overlay(h, w):
+    """Sector lines image + circle centers, built once per resolution."""
+    entry = _overlay_cache.get((h, w))
+    if entry is None:
+        overlay = np.zeros((h, w, 3), dtype=np.uint8)
+        cv2.line(overlay, (w // 3, 0), (w // 3, h), (255, 0, 0), 2)
+        cv2.line(overlay, (2 * w // 3, 0), (2 * w // 3, h), (255, 0, 0), 2)
+        centers = tuple(((i * w // 3) + (w // 6), h // 2) for i in range(3))
+        entry = (overlay, centers)
+        _overlay_cache[(h, w)] = entry
+    return entry
+
+
 def _draw_debug(frame, detections, occupancy, distance):
     """Draw debug visualization."""
+    # Static sector lines come from a precomputed overlay; only the
+    # dynamic elements are drawn per frame
+    overlay, centers = _static_overlay(frame.shape[0], frame.shape[1])
+    cv2.add(frame, overlay, dst=frame)
+
     # Draw detections
     for det in detections:
         x1, y1, x2, y2 = det["bbox"]
@@ -272,18 +352,11 @@ def _draw_debug(frame, detections, occupancy, distance):
         label = det.get("label", f"cls_{det.get('cls', '?')}")
         cv2.putText(frame, label, (x1, y1-10),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-    
-    # Draw sectors
-    width = frame.shape[1]
-    cv2.line(frame, (width//3, 0), (width//3, frame.shape[0]), (255, 0, 0), 2)
-    cv2.line(frame, (2*width//3, 0), (2*width//3, frame.shape[0]), (255, 0, 0), 2)
-    
-    # Draw occupancy
-    colors = [(0, 0, 255) if occ else (0, 255, 0) for occ in occupancy]
-    for i, color in enumerate(colors):
-        x = (i * width // 3) + (width // 6)
-        cv2.circle(frame, (x, frame.shape[0]//2), 30, color, -1)
-    
+
+    # Draw occupancy (colors change per frame, positions do not)
+    for center, occ in zip(centers, occupancy):
+        cv2.circle(frame, center, 30, (0, 0, 255) if occ else (0, 255, 0), -1)
+
     # Draw distance
     if distance:
         cv2.putText(frame, f"{distance:.1f}m", (10, 30),
@@ -0,0 +1,107 @@
+"""Threaded camera grabber that always serves the freshest frame."""
+import threading
+import time
+
+import numpy as np
+
+class CameraThread:
+    """Background grabber wrapping an opened cv2.VideoCapture.
+
+    V4L2/DSHOW backends queue frames internally, so a plain cap.read()
+    in the processing loop returns stale images even with BUFFERSIZE=1.
+    A daemon thread grabs continuously (grab() is cheap when the kernel
+    buffer is full), keeping only the latest retrieved frame; the main
+    loop reads that under a lock and is never more than ~1 frame behind.
+
+    Frames land in a double-buffered ndarray pair via retrieve(dst):
+    cap.read() would otherwise allocate ~900 KB per 640x480 frame. The
+    grabber free-runs at camera rate, so read() copies the published
+    buffer into a consumer-owned one under the lock — the caller's
+    frame stays stable however long its iteration takes, and steady
+    state still allocates nothing.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+        self._cond = threading.Condition()
+        self._frame = None
+        self._ok = False
+        self._running = False
+        self._thread = None
+        self._buffers = None  # allocated once the frame shape is known
+        self._write = 0  # index of the buffer the grabber writes next
+        self._out = None  # consumer-owned copy handed out by read()
+
+    def start(self):
+        """Start the grabber thread (idempotent)."""
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while self._running:
+            buf = None
+            try:
+                if not self.cap.grab():
+                    self._ok = False
+                    time.sleep(0.01)
+                    continue
+                if self._buffers is not None:
+                    buf = self._buffers[self._write]
+                    ok, frame = self.cap.retrieve(buf)
+                else:
+                    ok, frame = self.cap.retrieve()
+            except Exception:
+                ok, frame = False, None
+            if ok and frame is not None:
+                if self._buffers is None:
+                    # First frame fixes the shape; pair up with a twin
+                    self._buffers = (frame, np.empty_like(frame))
+                    self._write = 1
+                elif frame is buf:
+                    # Decoded in place: publish this buffer, write the
+                    # other one next so the consumer's view stays intact
+                    self._write ^= 1
+            with self._cond:
+                self._ok = ok
+                if ok:
+                    self._frame = frame
+                self._cond.notify_all()
+
+    def read(self):
+        """Return (ok, latest frame); drop-in for cap.read().
+
+        The frame is copied out under the lock into a buffer the
+        grabber never touches: the double buffer alone only protects
+        the published frame for one grab cycle, and a main-loop
+        iteration with a YOLO forward routinely outlives that.
+        """
+        with self._cond:
+            if self._frame is None:
+                return self._ok, None
+            if self._out is None or self._out.shape != self._frame.shape:
+                self._out = np.empty_like(self._frame)
+            np.copyto(self._out, self._frame)
+            return True, self._out
+
+    def wait_new_frame(self, timeout: float = 0.1) -> bool:
+        """Block until the grabber stores a new frame (or timeout)."""
+        with self._cond:
+            return self._cond.wait(timeout)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        """Stop the grabber and release the underlying capture."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        try:
+            self.cap.release()
+        except Exception:
+            pass
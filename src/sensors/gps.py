@@ -1,3 +1,4 @@
+import time
 from typing import Optional, Tuple
 
 try:
@@ -5,22 +6,32 @@ try:
 except Exception:
     GPS_SERIAL_PORT = None
 
+# Import optional dependencies once at module load; read_location ran
+# the import machinery (cached or not, a dict lookup plus lock) per call
+try:
+    import serial
+except Exception:
+    serial = None
+try:
+    import pynmea2
+except Exception:
+    pynmea2 = None
+
+# Talker prefixes we parse, matched on raw bytes so non-matching NMEA
+# lines (the majority of a typical stream) are skipped without a decode
+_NMEA_PREFIXES = frozenset((b'$GPGGA', b'$GNGGA', b'$GPRMC', b'$GNRMC'))
+
 
 class GPS:
-    def __init__(self, port: str | None = None, baud: int = 9600, timeout: float = 1.0):
+    def __init__(self, port: str | None = None, baud: int = 9600, timeout: float = 0.05):
         self.port = port or GPS_SERIAL_PORT
         self.baud = baud
         self.timeout = timeout
         self._serial = None
         self._warned = False
-        try:
-            if self.port:
-                import serial  # noqa: F401
-                import pynmea2  # noqa: F401
-                # Defer opening until first read to avoid errors on desktops
-        except Exception:
-            # Missing dependencies are handled on read
-            pass
+        self._rx = b""  # partial NMEA line carried across reads
+        # Port opening is deferred until first read to avoid errors on
+        # desktops; missing dependencies are handled there too
 
     def _open_if_needed(self):
         if self._serial is not None:
@@ -30,8 +41,12 @@ class GPS:
                 print("⚠️ GPS port not configured (set GPS_SERIAL_PORT in .env)")
                 self._warned = True
             return False
+        if serial is None:
+            if not self._warned:
+                print("⚠️ pyserial not installed. Install: pip install pyserial pynmea2")
+                self._warned = True
+            return False
         try:
-            import serial
             self._serial = serial.Serial(self.port, baudrate=self.baud, timeout=self.timeout)
             return True
         except Exception as e:
@@ -43,10 +58,12 @@ class GPS:
     def read_location(self) -> Optional[Tuple[float, float]]:
         """Read a single (lat, lon) from NMEA. Returns None if unavailable.
         Parses common talkers: GGA (fix), RMC (recommended minimum).
+        Bounded by a hard ~1 s deadline — one full NMEA cycle, since
+        receivers emit GGA/RMC at 1 Hz — so a stalled receiver can
+        never block the caller for long, but a freshly opened port
+        still sees a fix on the first call.
         """
-        try:
-            import pynmea2
-        except Exception:
+        if pynmea2 is None:
             if not self._warned:
                 print("⚠️ pynmea2 not installed. Install: pip install pyserial pynmea2")
                 self._warned = True
@@ -56,32 +73,24 @@ class GPS:
             return None
 
         try:
-            # Read a few lines to find a valid fix quickly
-            for _ in range(30):
-                line = self._serial.readline()
-                if not line:
-                    continue
-                try:
-                    s = line.decode('ascii', errors='replace').strip()
-                except Exception:
-                    continue
-                if not (s.startswith('$GPGGA') or s.startswith('$GNGGA') or s.startswith('$GPRMC') or s.startswith('$GNRMC')):
-                    continue
-                try:
-                    msg = pynmea2.parse(s)
-                except Exception:
+            # Drain whatever is pending in bulk and bail at the deadline;
+            # the old 30 x readline() loop could block for 30 s of
+            # serial timeouts if lines stopped arriving. The budget
+            # covers one 1 Hz sentence cycle so the first read after
+            # opening the port (empty OS buffer) can still get a fix.
+            deadline = time.monotonic() + 1.0
+            while time.monotonic() < deadline:
+                chunk = self._serial.read(self._serial.in_waiting or 1)
+                if not chunk:
                     continue
-                # Prefer RMC if it has valid status
-                if msg.sentence_type == 'RMC':
-                    # Status A = valid
-                    status = getattr(msg, 'status', 'V')
-                    if status == 'A' and msg.latitude and msg.longitude:
-                        return float(msg.latitude), float(msg.longitude)
-                elif msg.sentence_type == 'GGA':
-                    # fix_quality > 0 means valid
-                    fix_q = getattr(msg, 'gps_qual', 0)
-                    if fix_q and msg.latitude and msg.longitude:
-                        return float(msg.latitude), float(msg.longitude)
+                self._rx += chunk
+                *lines, self._rx = self._rx.split(b'\n')
+                for line in lines:
+                    loc = self._parse_line(line)
+                    if loc is not None:
+                        return loc
+                if len(self._rx) > 4096:
+                    self._rx = b""  # garbage stream; drop the fragment
             return None
         except Exception as e:
             # Any serial error -> drop connection and report once
@@ -91,7 +100,31 @@ class GPS:
             except Exception:
                 pass
             self._serial = None
+            self._rx = b""
             if not self._warned:
                 print(f"⚠️ GPS read error: {e}")
                 self._warned = True
             return None
+
+    @staticmethod
+    def _parse_line(line: bytes) -> Optional[Tuple[float, float]]:
+        """Parse one raw NMEA line; (lat, lon) on a valid fix, else None."""
+        if line[:6] not in _NMEA_PREFIXES:
+            return None
+        try:
+            s = line.decode('ascii', errors='replace').strip()
+            msg = pynmea2.parse(s)
+        except Exception:
+            return None
+        # Prefer RMC if it has valid status
+        if msg.sentence_type == 'RMC':
+            # Status A = valid
+            status = getattr(msg, 'status', 'V')
+            if status == 'A' and msg.latitude and msg.longitude:
+                return float(msg.latitude), float(msg.longitude)
+        elif msg.sentence_type == 'GGA':
+            # fix_quality > 0 means valid
+            fix_q = getattr(msg, 'gps_qual', 0)
+            if fix_q and msg.latitude and msg.longitude:
+                return float(msg.latitude), float(msg.longitude)
+        return None
@@ -1,7 +1,7 @@
 """Ultrasonic distance sensor (HC-SR04 or similar)."""
-import statistics
 import time
 import math
+import numpy as np
 from typing import Optional
 
 class Ultrasonic:
@@ -20,6 +20,10 @@ class Ultrasonic:
         self.gpio = None
         self._sim_manual: Optional[float] = None  # meters; if set, use this value
         self._sim_t0 = time.time()
+        # Reused sample buffer for median(); avoids a list alloc per call
+        self._buf = np.empty(16, dtype=np.float32)
+        # Angular frequency of the simulated oscillation (5 s period)
+        self._omega = 2 * math.pi / 5.0
         
         try:
             import RPi.GPIO as GPIO
@@ -46,7 +50,7 @@ class Ultrasonic:
                 return max(0.05, min(4.0, float(self._sim_manual)))
             t = time.time() - self._sim_t0
             # Smooth sine wave between 0.4 and 3.0 meters
-            base = 1.7 + 1.3 * math.sin(2 * math.pi * (t / 5.0))
+            base = 1.7 + 1.3 * math.sin(self._omega * t)
             return max(0.4, min(3.0, base))
         
         try:
@@ -97,14 +101,22 @@ class Ultrasonic:
         Returns:
             Median distance in meters or None
         """
-        vals = []
+        if self.gpio is None:
+            # Simulated readings are deterministic within a call; the
+            # median of n identical samples is just one reading.
+            return self.read_distance()
+
+        n = min(n, self._buf.shape[0])
+        k = 0
         for _ in range(n):
             d = self.read_distance()
             if d is not None:
-                vals.append(d)
-            time.sleep(0.02)  # 20ms between readings
-        
-        return statistics.median(vals) if vals else None
+                self._buf[k] = d
+                k += 1
+            if self.gpio is not None:
+                time.sleep(0.02)  # settle time between hardware pings
+
+        return float(np.median(self._buf[:k])) if k else None
     
     def cleanup(self):
         """Cleanup GPIO resources."""